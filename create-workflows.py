@@ -1,127 +1,208 @@
 #!/usr/bin/env python3
 import pathlib
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 workflows_dir = pathlib.Path('f:/pulse1/.github/workflows')
 workflows_dir.mkdir(parents=True, exist_ok=True)
 
+NODE_VERSION_ENV = '${{ env.NODE_VERSION }}'
+
+# Third-party actions, pinned to a full commit SHA where one has been verified
+# against the upstream tag (with the tag in a trailing comment). The rest still
+# resolve a tag and should be pinned the same way once their SHAs are checked.
+ACTIONS = {
+    'checkout_action': 'actions/checkout@11bd71901bbe5b1630ceea73d27597364c9af683  # v4.2.2',
+    'setup_node_action': 'actions/setup-node@v4',
+    'cache_action': 'actions/cache@v4',
+    'upload_artifact_action': 'actions/upload-artifact@v4',
+    'download_artifact_action': 'actions/download-artifact@v4',
+    'github_script_action': 'actions/github-script@v7',
+    'vercel_action': 'amondnet/vercel-action@v25',
+    'lighthouse_action': 'treosh/lighthouse-ci-action@v10',
+    'codeql_init_action': 'github/codeql-action/init@v3',
+    'codeql_analyze_action': 'github/codeql-action/analyze@v3',
+}
+
+# Local composite action holding the setup-node + install steps, so every job
+# that needs node_modules shares one definition instead of its own copy
+SETUP_ACTION_TEMPLATE = r'''name: Setup Node.js and dependencies
+description: Set up Node.js with the npm cache and install dependencies
+
+inputs:
+  node-version:
+    description: Node.js version to install
+    required: false
+    default: '18'
+  cache-node-modules:
+    description: >-
+      Restore node_modules from cache so sequential jobs in one pipeline only
+      pay for a single install. npm ci wipes node_modules, so it only runs on
+      a cache miss; ~/.npm is already covered by setup-node.
+    required: false
+    default: 'false'
+
+runs:
+  using: composite
+  steps:
+    - name: Setup Node.js
+      uses: {setup_node_action}
+      with:
+        node-version: ${{ inputs.node-version }}
+        cache: 'npm'
+
+    - name: Cache node_modules
+      id: node-modules-cache
+      if: inputs.cache-node-modules == 'true'
+      uses: {cache_action}
+      with:
+        path: node_modules
+        key: ${{ runner.os }}-node-modules-${{ inputs.node-version }}-${{ hashFiles('**/package-lock.json') }}
+
+    - name: Install dependencies
+      if: steps.node-modules-cache.outputs.cache-hit != 'true'
+      shell: bash
+      run: npm ci --prefer-offline --no-audit --fund=false
+'''
+
+# Checkout + shared setup prologue for every job that needs node_modules
+# (the local action can only be resolved once the repo is checked out)
+SETUP_STEPS = r'''- name: Checkout code
+        uses: {checkout_action}
+
+      - name: Setup Node.js and dependencies
+        id: setup
+        uses: ./.github/actions/setup
+        with:
+          node-version: {node_version}'''
+
+# Same prologue, sharing node_modules between sequential jobs of one pipeline
+CACHED_SETUP_STEPS = r'''- name: Checkout code
+        uses: {checkout_action}
+
+      - name: Setup Node.js and dependencies
+        id: setup
+        uses: ./.github/actions/setup
+        with:
+          node-version: {node_version}
+          cache-node-modules: true'''
+
+# Superseded runs in the same group are cancelled unless a workflow opts out
+# (production deploys must never be killed mid-flight)
+CONCURRENCY_BLOCK = r'''concurrency:
+  group: ${{ github.workflow }}-{concurrency_key}
+  cancel-in-progress: {cancel_in_progress}'''
+
+# GitHub keeps only one pending run per group, so push and scheduled runs get a
+# group of their own (the run id) and only pull request runs supersede each other
+PR_ONLY_KEY = "${{ github.event_name == 'pull_request' && github.ref || github.run_id }}"
+
+
+# Docs-only changes skip CI; deploys only fire when something that ends up in
+# the bundle (or the deploy config) changes
+DOCS_PATHS = "['**.md', 'docs/**', '.gitignore']"
+DEPLOY_PATHS = ("['src/**', 'public/**', 'index.html', 'package*.json', 'vite.config.*', "
+                "'tsconfig.json', 'tailwind.config.js', 'postcss.config.js', 'vercel.json']")
+
+
+# {name} left behind after rendering; ${{ }} expressions and JS ${...} templates
+# never match because of the leading $ or the spaces/dots inside
+PLACEHOLDER = re.compile(r'(?<!\$)\{([a-z_]+)\}')
+
+
+def render(template, **fields):
+    # str.format() would choke on the ${{ }} expressions, so substitute by name.
+    # Fragments can carry placeholders of their own, so keep passing over the
+    # text until nothing changes; the result never depends on the order of fields.
+    for _ in range(len(fields) + 1):
+        rendered = template
+        for key, value in fields.items():
+            rendered = rendered.replace('{%s}' % key, value)
+        if rendered == template:
+            break
+        template = rendered
+    leftover = sorted(set(PLACEHOLDER.findall(template)))
+    if leftover:
+        raise ValueError('unresolved placeholders: %s' % ', '.join(leftover))
+    return template
+
+
 # CI Workflow
-ci_yml = workflows_dir / 'ci.yml'
-ci_yml.write_text(r'''name: Continuous Integration
+CI_TEMPLATE = r'''name: Continuous Integration
 
 on:
   push:
     branches: [main, develop]
+    paths-ignore: {docs_paths}
   pull_request:
     branches: [main, develop]
+    paths-ignore: {docs_paths}
+
+{concurrency}
 
 env:
   NODE_VERSION: '18'
 
 jobs:
-  lint:
-    name: Lint Code
+  ci:
+    name: Lint, Test, Build & Audit
     runs-on: ubuntu-latest
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {setup}
 
       - name: Run ESLint
         run: npm run lint
         continue-on-error: false
 
+      # !cancelled() rather than always(): keep reporting after a failed step,
+      # but stop once a superseded run has been cancelled
       - name: Check TypeScript
+        if: ${{ !cancelled() && steps.setup.outcome == 'success' }}
         run: npx tsc --noEmit
 
-  test:
-    name: Run Tests
-    runs-on: ubuntu-latest
-    steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
-
       - name: Run tests
+        if: ${{ !cancelled() && steps.setup.outcome == 'success' }}
         run: npm test || echo "Tests not configured"
         continue-on-error: true
 
-  build:
-    name: Build Application
-    runs-on: ubuntu-latest
-    needs: [lint, test]
-    steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
-
       - name: Build application
+        id: build
+        if: ${{ !cancelled() && steps.setup.outcome == 'success' }}
         run: npm run build
         env:
           CI: true
           GENERATE_SOURCEMAP: false
 
       - name: Check build size
+        if: ${{ !cancelled() && steps.setup.outcome == 'success' }}
         run: |
           echo "Build size analysis:"
           du -sh dist/ || echo "Build directory not found"
 
       - name: Upload build artifacts
-        uses: actions/upload-artifact@v3
+        if: ${{ !cancelled() && steps.build.outcome == 'success' }}
+        uses: {upload_artifact_action}
         with:
           name: build-artifacts
           path: dist/
-          retention-days: 7
-
-  security-audit:
-    name: Security Audit
-    runs-on: ubuntu-latest
-    steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
+          retention-days: 1
 
       - name: Run npm audit
+        if: ${{ !cancelled() && steps.setup.outcome == 'success' }}
         run: npm audit --audit-level=high
         continue-on-error: true
-''', encoding='utf-8')
+'''
 
 # Staging Deployment Workflow
-staging_yml = workflows_dir / 'deploy-staging.yml'
-staging_yml.write_text(r'''name: Deploy to Staging
+STAGING_TEMPLATE = r'''name: Deploy to Staging
 
 on:
   pull_request:
     branches: [main]
     types: [opened, synchronize, reopened]
+    paths: {deploy_paths}
+
+{concurrency}
 
 env:
   NODE_VERSION: '18'
@@ -134,17 +215,7 @@ jobs:
       name: staging
       url: ${{ steps.deploy.outputs.url }}
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {setup}
 
       - name: Build application
         run: npm run build
@@ -158,7 +229,7 @@ jobs:
 
       - name: Deploy to Vercel
         id: deploy
-        uses: amondnet/vercel-action@v25
+        uses: {vercel_action}
         with:
           vercel-token: ${{ secrets.VERCEL_TOKEN }}
           vercel-org-id: ${{ secrets.VERCEL_ORG_ID }}
@@ -166,7 +237,7 @@ jobs:
           working-directory: ./
 
       - name: Comment PR with deployment URL
-        uses: actions/github-script@v7
+        uses: {github_script_action}
         if: github.event_name == 'pull_request'
         env:
           DEPLOY_URL: ${{ steps.deploy.outputs.url }}
@@ -182,15 +253,15 @@ jobs:
               repo: context.repo.repo,
               body: `### Staging Deployment Successful\n\n**URL**: ${deployUrl}\n**Commit**: ${commitSha.substring(0, 7)}\n**Deployed at**: ${new Date().toISOString()}`
             })
-''', encoding='utf-8')
+'''
 
 # Production Deployment Workflow
-production_yml = workflows_dir / 'deploy-production.yml'
-production_yml.write_text(r'''name: Deploy to Production
+PRODUCTION_TEMPLATE = r'''name: Deploy to Production
 
 on:
   push:
     branches: [main]
+    paths: {deploy_paths}
   workflow_dispatch:
     inputs:
       skip_tests:
@@ -199,6 +270,8 @@ on:
         default: false
         type: boolean
 
+{concurrency}
+
 env:
   NODE_VERSION: '18'
 
@@ -207,17 +280,7 @@ jobs:
     name: Pre-Deployment Checks
     runs-on: ubuntu-latest
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {cached_setup}
 
       - name: Run linting
         run: npm run lint
@@ -235,17 +298,7 @@ jobs:
     runs-on: ubuntu-latest
     needs: [pre-deployment]
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: ${{ env.NODE_VERSION }}
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {cached_setup}
 
       - name: Build application
         run: npm run build
@@ -259,7 +312,7 @@ jobs:
           VITE_SENTRY_DSN: ${{ secrets.SENTRY_DSN }}
 
       - name: Upload build artifacts
-        uses: actions/upload-artifact@v3
+        uses: {upload_artifact_action}
         with:
           name: production-build
           path: dist/
@@ -274,17 +327,17 @@ jobs:
       url: https://pulse.yourdomain.com
     steps:
       - name: Checkout code
-        uses: actions/checkout@v4
+        uses: {checkout_action}
 
       - name: Download build artifacts
-        uses: actions/download-artifact@v3
+        uses: {download_artifact_action}
         with:
           name: production-build
           path: dist/
 
       - name: Deploy to Vercel
         id: deploy
-        uses: amondnet/vercel-action@v25
+        uses: {vercel_action}
         with:
           vercel-token: ${{ secrets.VERCEL_TOKEN }}
           vercel-org-id: ${{ secrets.VERCEL_ORG_ID }}
@@ -305,52 +358,46 @@ jobs:
           echo "Checking production health..."
           curl -f https://pulse.yourdomain.com/ || echo "Health check failed"
         continue-on-error: true
-''', encoding='utf-8')
+'''
 
 # Lighthouse CI Workflow
-lighthouse_yml = workflows_dir / 'lighthouse.yml'
-lighthouse_yml.write_text(r'''name: Lighthouse CI
+LIGHTHOUSE_TEMPLATE = r'''name: Lighthouse CI
 
 on:
   pull_request:
     branches: [main, develop]
+    paths-ignore: {docs_paths}
   schedule:
     - cron: '0 0 * * 0'
 
+{concurrency}
+
 jobs:
   lighthouse:
     name: Lighthouse Performance Audit
     runs-on: ubuntu-latest
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: '18'
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {setup}
 
       - name: Build application
         run: npm run build
         env:
           CI: true
 
+      - name: Write Lighthouse CI config
+        run: |
+          echo '{"ci":{"collect":{"staticDistDir":"./dist","numberOfRuns":1}}}' > "${{ runner.temp }}/lighthouserc.json"
+
       - name: Run Lighthouse CI
-        uses: treosh/lighthouse-ci-action@v10
+        uses: {lighthouse_action}
         with:
-          urls: |
-            http://localhost:3000
+          configPath: ${{ runner.temp }}/lighthouserc.json
           uploadArtifacts: true
           temporaryPublicStorage: true
-''', encoding='utf-8')
+'''
 
 # Security Scan Workflow
-security_yml = workflows_dir / 'security-scan.yml'
-security_yml.write_text(r'''name: Security Scanning
+SECURITY_TEMPLATE = r'''name: Security Scanning
 
 on:
   push:
@@ -360,22 +407,14 @@ on:
   schedule:
     - cron: '0 2 * * 1'
 
+{concurrency}
+
 jobs:
   dependency-scan:
     name: Dependency Scan
     runs-on: ubuntu-latest
     steps:
-      - name: Checkout code
-        uses: actions/checkout@v4
-
-      - name: Setup Node.js
-        uses: actions/setup-node@v4
-        with:
-          node-version: '18'
-          cache: 'npm'
-
-      - name: Install dependencies
-        run: npm ci
+      {setup}
 
       - name: Run npm audit
         run: npm audit --audit-level=moderate
@@ -386,30 +425,53 @@ jobs:
     runs-on: ubuntu-latest
     steps:
       - name: Checkout code
-        uses: actions/checkout@v4
+        uses: {checkout_action}
 
       - name: Initialize CodeQL
-        uses: github/codeql-action/init@v3
+        uses: {codeql_init_action}
         with:
           languages: javascript, typescript
 
       - name: Perform CodeQL Analysis
-        uses: github/codeql-action/analyze@v3
+        uses: {codeql_analyze_action}
 
   secret-scan:
     name: Secret Detection
     runs-on: ubuntu-latest
     steps:
       - name: Checkout code
-        uses: actions/checkout@v4
-        with:
-          fetch-depth: 0
+        uses: {checkout_action}
 
       - name: Scan for secrets
         run: |
           echo "Scanning for secrets..."
-          ! grep -r "password\s*=\s*['\"]" src/ || echo "Warning: potential passwords found"
-          ! grep -r "api[_-]?key\s*=\s*['\"]" src/ || echo "Warning: potential API keys found"
-''', encoding='utf-8')
+          git grep -nIE -e "password\s*=\s*['\"]" -e "api[_-]?key\s*=\s*['\"]" -- src/ && echo "Warning: potential secrets found" || true
+'''
+
+workflows = [
+    ('ci.yml', CI_TEMPLATE, {'concurrency_key': PR_ONLY_KEY}),
+    ('deploy-staging.yml', STAGING_TEMPLATE, {}),
+    ('deploy-production.yml', PRODUCTION_TEMPLATE, {'cancel_in_progress': 'false'}),
+    ('lighthouse.yml', LIGHTHOUSE_TEMPLATE, {'node_version': "'18'"}),
+    ('security-scan.yml', SECURITY_TEMPLATE,
+     {'node_version': "'18'", 'concurrency_key': PR_ONLY_KEY}),
+]
+
+setup_action_dir = workflows_dir.parent / 'actions' / 'setup'
+setup_action_dir.mkdir(parents=True, exist_ok=True)
+
+files = [(setup_action_dir / 'action.yml',
+          render(SETUP_ACTION_TEMPLATE, **ACTIONS).encode('utf-8'))]
+for name, template, params in workflows:
+    fields = {'concurrency': CONCURRENCY_BLOCK, 'concurrency_key': '${{ github.ref }}',
+              'cancel_in_progress': 'true',
+              'setup': SETUP_STEPS, 'cached_setup': CACHED_SETUP_STEPS,
+              'node_version': NODE_VERSION_ENV,
+              'docs_paths': DOCS_PATHS, 'deploy_paths': DEPLOY_PATHS, **ACTIONS, **params}
+    files.append((workflows_dir / name, render(template, **fields).encode('utf-8')))
+
+# Overlap the create/write/close round-trips instead of paying for them one file at a time
+with ThreadPoolExecutor(max_workers=len(files)) as executor:
+    list(executor.map(lambda file: file[0].write_bytes(file[1]), files))
 
 print("GitHub Actions workflows created successfully!")